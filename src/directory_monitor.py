@@ -1,14 +1,34 @@
-import configparser
 import logging
 import os
+import re
+import stat
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 import sys
 import json
 
+try:
+    import orjson # Optional: faster JSON encoding, emits bytes directly
+except ImportError:
+    orjson = None
+
+try:
+    from inotify_simple import INotify, flags # Optional, Linux only: wake on new files instead of polling
+except ImportError:
+    INotify = None
+
 # --- Constants ---
 CONFIG_FILE = 'config.ini'
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Idle checks only move last_check_time; persist it at least this often so the dashboard can tell we're alive
+STATUS_SAVE_EVERY_IDLE_CHECKS = 10
+# A directory mtime this close to "now" isn't trusted for skipping scans: with coarse timestamps
+# (HFS+ 1s, FAT/exFAT 2s, network mounts) a file created later in the same tick leaves it unchanged
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+# Upper bound on threads used to process a burst of new files (the work is I/O-bound)
+MAX_PROCESS_WORKERS = 8
 ACK_PLAN_TEMPLATE = """
 Acknowledgement:
 Received and read file: {original_filename}
@@ -21,10 +41,21 @@ Execution Plan:
 4. Verify the successful completion of the task.
 5. Report status/results as required.
 """
+# ACK_PLAN_TEMPLATE split around its placeholders once at import, so building an ack is a bytes join
+# (the template reads: filename, timestamp, filename)
+_ACK_1, _ACK_2, _ACK_3, _ACK_4 = (
+    part.encode('utf-8')
+    for part in re.split(r'\{original_filename\}|\{timestamp\}', ACK_PLAN_TEMPLATE)
+)
+# INI parsing, one line at a time: "[Section]" headers and "key = value" lines (comments start with # or ;)
+SECTION_RE = re.compile(r'\[([^\]]+)\][ \t]*')
+KV_RE = re.compile(r'([^=;#\s][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t]*')
 
 # --- Global State ---
-# Keep track of files already seen/processed to avoid reprocessing
+# Keep track of files (by name) already seen/processed to avoid reprocessing
 processed_files = set()
+# Directory mtime seen at the last full scan; unchanged mtime means no entries were added/removed
+_last_dir_mtime_ns = 0
 status_data = {
     "last_check_time": None,
     "last_files_found": 0,
@@ -33,6 +64,9 @@ status_data = {
     "error": None
 }
 status_file_path = Path('status.json') # Default path
+# Whether status_data has changes (beyond last_check_time) not yet saved, and checks since the last save
+_status_dirty = False
+_checks_since_save = 0
 
 # --- Logging Setup ---
 def setup_logging():
@@ -45,9 +79,32 @@ def setup_logging():
     logging.info("Logging initialized.")
 
 # --- Configuration Loading ---
+def parse_config(text):
+    """
+    Parses INI text into {section: {key: value}}. Keys are lower-cased like configparser.
+
+    Raises ValueError (like configparser's ParsingError) for a line that is neither blank,
+    a comment, a section header nor a "key = value" inside a section.
+    """
+    config = {}
+    section = None
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        header = SECTION_RE.fullmatch(line)
+        if header:
+            section = config.setdefault(header.group(1).strip(), {})
+            continue
+        kv = KV_RE.fullmatch(line)
+        if kv is None or section is None:
+            raise ValueError(f"Line {line_no}: expected '[Section]' or 'key = value' in a section, got {line!r}")
+        section[kv.group(1).lower()] = kv.group(2)
+    return config
+
+
 def load_config(config_file_path):
     """Loads configuration from the specified INI file."""
-    config = configparser.ConfigParser()
     if not config_file_path.is_file():
         logging.error(f"Configuration file not found: {config_file_path}")
         print(f"Error: Configuration file '{config_file_path}' not found.")
@@ -55,11 +112,12 @@ def load_config(config_file_path):
         sys.exit(1) # Exit if config is missing
 
     try:
-        config.read(config_file_path)
-        monitor_dir_str = config.get('Monitor', 'ToDoDirectory', fallback=None)
-        poll_interval_str = config.get('Monitor', 'PollIntervalSeconds', fallback='900') # Default 15 mins
-        ack_suffix = config.get('Monitor', 'AckSuffix', fallback='_ack.txt')
-        status_file_str = config.get('Monitor', 'StatusFile', fallback='status.json') # Get status file path
+        config = parse_config(config_file_path.read_text(encoding='utf-8'))
+        monitor_config = config.get('Monitor', {})
+        monitor_dir_str = monitor_config.get('tododirectory')
+        poll_interval_str = monitor_config.get('pollintervalseconds', '900') # Default 15 mins
+        ack_suffix = monitor_config.get('acksuffix', '_ack.txt')
+        status_file_str = monitor_config.get('statusfile', 'status.json') # Get status file path
 
         if not monitor_dir_str:
             logging.error("Configuration error: 'Directory' not set in [{}]".format('Monitor'))
@@ -101,7 +159,7 @@ def load_config(config_file_path):
         logging.info(f"Configuration loaded: MonitorDir='{monitor_dir}', PollInterval={poll_interval}s, AckSuffix='{ack_suffix}', StatusFile='{status_file_path}'")
         return monitor_dir, poll_interval, ack_suffix
 
-    except configparser.Error as e:
+    except (OSError, UnicodeDecodeError, ValueError) as e:
         logging.error(f"Error reading configuration file {config_file_path}: {e}")
         print(f"Error parsing configuration file '{config_file_path}'. Check its format.")
         sys.exit(1)
@@ -112,12 +170,52 @@ def load_config(config_file_path):
 
 
 # --- Status Saving ---
+def write_all(fd, data: bytes):
+    """Writes all of data to fd, continuing after short writes (which os.write may return)."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        if written == 0:
+            raise OSError(f"Short write: {len(view)} of {len(data)} bytes not written")
+        view = view[written:]
+
+
+def set_status(**changes):
+    """Updates status_data, marking it dirty if any value actually changed."""
+    global _status_dirty
+    for key, value in changes.items():
+        if status_data.get(key) != value:
+            status_data[key] = value
+            _status_dirty = True
+
+
+def flush_status():
+    """Saves status_data after a check if it is dirty, or if too many idle checks have gone unsaved."""
+    global _checks_since_save
+    _checks_since_save += 1
+    if _status_dirty or _checks_since_save >= STATUS_SAVE_EVERY_IDLE_CHECKS:
+        save_status()
+
+
 def save_status():
     """Saves the current status_data dictionary to the JSON file."""
-    global status_data, status_file_path
+    global status_data, status_file_path, _status_dirty, _checks_since_save
     try:
-        with status_file_path.open('w', encoding='utf-8') as f:
-            json.dump(status_data, f, indent=4)
+        # Serialize once and write it in a single call, then atomically swap the file in
+        # so readers (status_app.py) never see a partially written status
+        if orjson is not None:
+            status_bytes = orjson.dumps(status_data, option=orjson.OPT_INDENT_2)
+        else:
+            status_bytes = json.dumps(status_data, indent=2).encode('utf-8')
+        tmp_path = status_file_path.with_suffix('.json.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            write_all(fd, status_bytes) # A short write must fail before the rename, not publish a partial file
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, status_file_path)
+        _status_dirty = False
+        _checks_since_save = 0
         logging.debug(f"Status saved to {status_file_path}")
     except IOError as e:
         logging.error(f"Failed to save status to {status_file_path}: {e}")
@@ -126,31 +224,31 @@ def save_status():
 
 
 # --- File Processing ---
-def process_file(file_path: Path, ack_suffix: str):
-    """Reads the instruction file and creates an acknowledgment file."""
-    logging.info(f"Processing new file: {file_path.name}")
+def process_file(file_path: str, ack_suffix: str, timestamp: str):
+    """Confirms the instruction file exists and creates an acknowledgment file stamped with the check's timestamp."""
+    file_name = os.path.basename(file_path)
+    logging.info(f"Processing new file: {file_name}")
     try:
-        # 1. Read the instruction file content
-        with file_path.open('r', encoding='utf-8') as f:
-            content = f.read()
-            logging.info(f"Successfully read content from {file_path.name}")
-            # You could potentially parse or use 'content' here if needed
+        # 1. Confirm the instruction file is (still) a regular file; its content isn't used,
+        #    so a stat is enough (read it here if the instructions ever need parsing)
+        if not stat.S_ISREG(os.stat(file_path).st_mode):
+            logging.warning(f"Skipping {file_name}: not a regular file")
+            return
 
         # 2. Create the acknowledgment file path
-        ack_filename = f"{file_path.stem}{ack_suffix}"
-        ack_filepath = file_path.with_name(ack_filename)
+        ack_filepath = os.path.splitext(file_path)[0] + ack_suffix
 
         # 3. Prepare acknowledgment content
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S %Z")
-        ack_content = ACK_PLAN_TEMPLATE.format(
-            original_filename=file_path.name,
-            timestamp=timestamp
-        )
+        name_bytes = file_name.encode('utf-8')
+        ack_bytes = b''.join((_ACK_1, name_bytes, _ACK_2, timestamp.encode('utf-8'), _ACK_3, name_bytes, _ACK_4))
 
         # 4. Write the acknowledgment file
-        with ack_filepath.open('w', encoding='utf-8') as f_ack:
-            f_ack.write(ack_content)
-        logging.info(f"Created acknowledgment file: {ack_filepath.name}")
+        fd = os.open(ack_filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            write_all(fd, ack_bytes) # A short write raises instead of leaving a truncated ack
+        finally:
+            os.close(fd)
+        logging.info(f"Created acknowledgment file: {os.path.basename(ack_filepath)}")
 
     except FileNotFoundError:
         logging.error(f"File not found during processing (it might have been deleted): {file_path}")
@@ -161,58 +259,128 @@ def process_file(file_path: Path, ack_suffix: str):
 
 
 # --- Directory Monitoring ---
+def scan_directory(monitor_dir: Path, ack_suffix: str):
+    """Returns {name: path} for the instruction .txt files directly inside monitor_dir."""
+    # Names come straight from readdir: no Path object and no stat per entry. A non-regular
+    # entry that matches (e.g. a directory named "x.txt") is rejected by process_file instead.
+    files = {}
+    with os.scandir(monitor_dir) as it:
+        for entry in it:
+            name = entry.name
+            # Cheapest checks first. Hidden files (macOS "._" metadata, editor temp files) are never
+            # instructions, and ack files never enter the processed set.
+            if name.startswith('.') or not name.endswith('.txt') or name.endswith(ack_suffix):
+                continue
+            files[name] = entry.path
+    return files
+
+
 def check_directory(monitor_dir: Path, ack_suffix: str):
     """Checks the directory for new .txt files and processes them."""
-    global status_data, processed_files # Add status_data
+    global status_data, processed_files, _last_dir_mtime_ns # Add status_data
     logging.debug(f"Checking directory: {monitor_dir}")
     files_processed_this_run = 0
-    status_data['last_check_time'] = time.strftime("%Y-%m-%d %H:%M:%S %Z")
-    status_data['error'] = None # Clear previous error
+    # One timestamp per check; every ack written in this check shares it
+    check_time = time.strftime("%Y-%m-%d %H:%M:%S %Z")
+    status_data['last_check_time'] = check_time # Not worth a save on its own; see flush_status
+    error = None # Clears any previous error
 
     try:
-        current_files = set(monitor_dir.glob('*.txt')) # Get all .txt files
+        # Stat before scanning, noting when: a file created after the stat bumps the mtime, unless
+        # the filesystem's timestamps are coarse and it lands in the same tick. That can only happen
+        # if the mtime is within the racy window of this stat, which the rule below refuses to cache.
+        stat_time_ns = time.time_ns()
+        dir_mtime_ns = os.stat(monitor_dir).st_mtime_ns
+        if dir_mtime_ns == _last_dir_mtime_ns and processed_files:
+            logging.info("Directory unchanged since last check.")
+            set_status(last_files_found=0, error=None)
+            flush_status()
+            return
+
+        current_files = scan_directory(monitor_dir, ack_suffix) # Get all instruction .txt files
         # Determine new files (present now but not in processed_files set)
-        new_files = current_files - processed_files
-
-        for file_path in new_files:
-            # Ignore already processed files (safeguard) and ack files
-            if file_path in processed_files or file_path.name.endswith(ack_suffix):
-                # Add ack files to processed set so they aren't re-checked constantly
-                processed_files.add(file_path)
-                continue
-
-            # Process the new instruction file
-            process_file(file_path, ack_suffix)
-            processed_files.add(file_path) # Mark as processed
-            files_processed_this_run += 1
-            status_data['total_processed_count'] += 1 # Increment total count
+        # Sorted so a burst (e.g. after an outage) is picked up in a stable, name-based order
+        new_files = sorted(current_files.keys() - processed_files)
+
+        # Process the whole batch first, then do the bookkeeping once (here, on this thread).
+        # process_file touches no shared state, so a burst is spread over a few threads.
+        new_paths = [current_files[file_name] for file_name in new_files]
+        if len(new_paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_PROCESS_WORKERS, len(new_paths))) as executor:
+                list(executor.map(process_file, new_paths, repeat(ack_suffix), repeat(check_time)))
+        elif new_paths:
+            process_file(new_paths[0], ack_suffix, check_time)
+        processed_files.update(new_files) # Mark as processed
+        files_processed_this_run = len(new_files)
+        set_status(total_processed_count=status_data['total_processed_count'] + files_processed_this_run) # Increment total count
 
         # Optional: Clean up processed_files set if files are deleted
         # This prevents the set from growing indefinitely if files are removed
         # from the directory externally.
-        deleted_files = processed_files - current_files
-        if deleted_files:
+        # Every current file is now in processed_files, so it can only be larger if some were
+        # deleted; checking the sizes first skips the O(processed) diff on nearly every check.
+        if len(processed_files) > len(current_files):
+            deleted_files = processed_files - current_files.keys()
             logging.debug(f"Removing {len(deleted_files)} deleted files from processed set.")
             processed_files.difference_update(deleted_files)
 
+        # Racy-mtime rule (as in git): only remember an mtime that was already old when it was
+        # stat()ed; a recent one leaves the cache as is, so the next check rescans
+        if stat_time_ns - dir_mtime_ns >= RACY_MTIME_WINDOW_NS:
+            _last_dir_mtime_ns = dir_mtime_ns
 
     except FileNotFoundError:
         logging.error(f"Monitor directory not found during check: {monitor_dir}. It might have been deleted.")
         # Depending on requirements, might want to exit or keep retrying
     except OSError as e:
         logging.error(f"OS error checking directory {monitor_dir}: {e}")
-        status_data['error'] = f"OS error checking directory: {e}"
+        error = f"OS error checking directory: {e}"
     except Exception as e:
         logging.error(f"Unexpected error checking directory {monitor_dir}: {e}")
-        status_data['error'] = f"Unexpected error checking directory: {e}"
+        error = f"Unexpected error checking directory: {e}"
 
     if files_processed_this_run > 0:
         logging.info(f"Processed {files_processed_this_run} new file(s).")
     else:
         logging.info("No new instruction files found.")
 
-    status_data['last_files_found'] = files_processed_this_run
-    save_status() # Save status after check
+    set_status(last_files_found=files_processed_this_run, error=error)
+    flush_status() # Save status after check if anything worth persisting changed
+
+
+# --- Change Notification ---
+def create_watcher(monitor_dir: Path):
+    """Returns an inotify watcher for files finishing or moving into monitor_dir, or None to fall back to polling."""
+    if INotify is None:
+        return None
+    try:
+        watcher = INotify()
+        watcher.add_watch(monitor_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+        return watcher
+    except (OSError, AttributeError) as e: # AttributeError: libc without inotify (non-Linux)
+        logging.warning(f"inotify unavailable, falling back to polling: {e}")
+        return None
+
+
+def wait_for_changes(watcher, poll_interval: int, ack_suffix: str):
+    """Blocks until instruction files arrive in the monitored directory or poll_interval seconds pass."""
+    if watcher is None:
+        logging.info(f"Sleeping for {poll_interval} seconds...")
+        time.sleep(poll_interval)
+        return
+    logging.info(f"Waiting up to {poll_interval} seconds for new files...")
+    deadline = time.monotonic() + poll_interval
+    while True:
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            return
+        # Events are only a wake-up signal (check_directory rescans anyway); read_delay coalesces a burst into one check
+        events = watcher.read(timeout=remaining_ms, read_delay=100)
+        if not events:
+            return # Timed out: periodic rescan
+        # Our own ack writes (and hidden temp files) land in the same directory; keep waiting past those
+        if any(not (event.name.endswith(ack_suffix) or event.name.startswith('.')) for event in events):
+            return
 
 
 # --- Main Application Logic ---
@@ -229,25 +397,25 @@ def main():
 
     logging.info("--- Directory Monitor Started ---")
     logging.info(f"Monitoring: {monitor_dir}")
-    logging.info(f"Checking every {poll_interval} seconds.")
+    logging.info(f"Checking every {poll_interval} seconds (or as soon as files arrive, where inotify is available).")
 
     # Initial scan to populate processed_files with existing files
     # so they are not processed on the first real check loop
     try:
         logging.info("Performing initial scan of the directory...")
-        initial_files = set(monitor_dir.glob('*.txt'))
+        initial_files = scan_directory(monitor_dir, ack_suffix)
         processed_files.update(initial_files)
-        logging.info(f"Initial scan complete. Found {len(initial_files)} existing .txt files (will be ignored).")
+        logging.info(f"Initial scan complete. Found {len(initial_files)} existing instruction files (will be ignored).")
     except Exception as e:
          logging.error(f"Error during initial scan of {monitor_dir}: {e}")
          # Decide if fatal or not, here we continue but log the error
 
     # Main monitoring loop
+    watcher = create_watcher(monitor_dir)
     try:
         while True:
             check_directory(monitor_dir, ack_suffix)
-            logging.info(f"Sleeping for {poll_interval} seconds...")
-            time.sleep(poll_interval)
+            wait_for_changes(watcher, poll_interval, ack_suffix)
     except KeyboardInterrupt:
         logging.info("--- Directory Monitor Stopped (Keyboard Interrupt) ---")
         status_data['monitoring_active'] = False
@@ -262,6 +430,8 @@ def main():
         save_status() # Save final status on error
         print(f"Monitor stopped due to unexpected error: {e}")
     finally:
+        if watcher is not None:
+            watcher.close()
         logging.info("Application shutdown.")
 
 if __name__ == "__main__":
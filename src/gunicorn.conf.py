@@ -0,0 +1,12 @@
+# Gunicorn settings for serving status_app in production.
+# Run from this directory (Gunicorn picks this file up automatically):
+#   gunicorn status_app:app
+
+bind = '127.0.0.1:5000'
+
+# Several workers, each with a few threads, so dashboard tabs polling /api/data
+# don't queue behind one another. Threads also select the gthread worker,
+# which (unlike the default sync worker) honours keep-alive.
+workers = 2
+threads = 4
+keepalive = 5
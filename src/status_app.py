@@ -1,6 +1,13 @@
+import hashlib
 import json
 import os
-from flask import Flask, jsonify, abort
+import time
+from flask import Flask, Response, abort, request
+
+try:
+    import orjson # Optional: faster JSON encoding/decoding
+except ImportError:
+    orjson = None
 
 # Create the Flask application instance
 app = Flask(__name__)
@@ -10,6 +17,29 @@ app = Flask(__name__)
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 JSON_FILE_PATH = os.path.join(DATA_DIR, 'status.json')
 
+# Raw bytes of the JSON file (plus their ETag), keyed by (inode, mtime, size) so a stat() tells us
+# whether it changed. Kept as one tuple so concurrent requests never pair a key with the wrong bytes.
+_data_cache = (None, b'', None)
+# The file is stat()ed at most this often; requests in between are served from memory, so a
+# slow (e.g. network) mount only blocks one request per interval. Well under the 5s max-age.
+STAT_INTERVAL_SECONDS = 1.0
+_data_checked_at = 0.0
+
+# --- JSON Helpers ---
+def _dump_json(data):
+    """Serializes data to indented JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _load_json(raw):
+    """Parses JSON bytes, using orjson when available. Both raise json.JSONDecodeError on bad input."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 # --- Helper Function to Load Data ---
 def fetchDataFromPython():
     """
@@ -33,8 +63,8 @@ def fetchDataFromPython():
                 "items": ["item1", "item2", "item3"],
                 "timestamp": "2023-01-01T12:00:00Z"
             }
-            with open(JSON_FILE_PATH, 'w') as f:
-                json.dump(sample_data, f, indent=4)
+            with open(JSON_FILE_PATH, 'wb') as f:
+                f.write(_dump_json(sample_data))
             print(f"Created sample data directory and file at: {JSON_FILE_PATH}")
 
         elif not os.path.exists(JSON_FILE_PATH):
@@ -44,13 +74,13 @@ def fetchDataFromPython():
                 "items": ["item1", "item2", "item3"],
                 "timestamp": "2023-01-01T12:00:00Z"
             }
-            with open(JSON_FILE_PATH, 'w') as f:
-                json.dump(sample_data, f, indent=4)
+            with open(JSON_FILE_PATH, 'wb') as f:
+                f.write(_dump_json(sample_data))
             print(f"Created sample data file at: {JSON_FILE_PATH}")
 
 
-        with open(JSON_FILE_PATH, 'r') as f:
-            data = json.load(f)
+        with open(JSON_FILE_PATH, 'rb') as f:
+            data = _load_json(f.read())
         return data
     except FileNotFoundError:
         print(f"Error: Data file not found at {JSON_FILE_PATH}")
@@ -64,15 +94,64 @@ def fetchDataFromPython():
         raise Exception(f"Could not read data file: {e}")
 
 
+def fetchRawDataFromPython():
+    """
+    Returns the JSON file's raw bytes, re-reading the file only when it has changed
+    (checked at most every STAT_INTERVAL_SECONDS).
+
+    The monitor replaces the file atomically, so its bytes are always valid JSON
+    and can be served as-is without parsing and re-serializing them.
+
+    Returns:
+        tuple: The contents of the JSON file (bytes), their ETag (a content hash, so
+            it is the same in every server worker) and the file's mtime in seconds.
+
+    Raises:
+        FileNotFoundError: If the JSON file does not exist and cannot be created.
+        OSError: For other file reading errors.
+    """
+    global _data_cache, _data_checked_at
+    cached_key, cached_bytes, etag = _data_cache
+    now = time.monotonic()
+    if cached_key is not None and now - _data_checked_at < STAT_INTERVAL_SECONDS:
+        return cached_bytes, etag, cached_key[1] / 1e9
+    # Claim this interval before the (possibly slow) stat, so concurrent requests keep
+    # getting the cached bytes instead of each blocking in their own stat
+    _data_checked_at = now
+
+    try:
+        st = os.stat(JSON_FILE_PATH)
+    except FileNotFoundError:
+        fetchDataFromPython() # Creates the sample file, as a plain fetch would
+        st = os.stat(JSON_FILE_PATH)
+
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if key != cached_key:
+        with open(JSON_FILE_PATH, 'rb') as f:
+            cached_bytes = f.read()
+        etag = hashlib.blake2b(cached_bytes, digest_size=16).hexdigest()
+        _data_cache = (key, cached_bytes, etag)
+    return cached_bytes, etag, st.st_mtime_ns / 1e9
+
+
 # --- API Endpoint ---
 @app.route('/api/data', methods=['GET'])
 def get_data():
     """
     API endpoint to fetch data from the JSON file.
+
+    Clients may reuse a response for a few seconds; after that, revalidating
+    with If-None-Match / If-Modified-Since gets an empty 304 while the file is
+    unchanged.
     """
     try:
-        data = fetchDataFromPython()
-        return jsonify(data)
+        raw, etag, last_modified = fetchRawDataFromPython()
+        response = Response(raw, mimetype='application/json')
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.max_age = 5
+        response.cache_control.must_revalidate = True
+        return response.make_conditional(request)
     except FileNotFoundError as e:
         # Return a 404 Not Found error if the file doesn't exist
         abort(404, description=str(e))
@@ -101,7 +180,8 @@ if __name__ == '__main__':
 
     # Run the Flask development server
     # Debug=True enables auto-reloading and provides detailed error pages
-    # In production, use a proper WSGI server like Gunicorn or uWSGI
+    # In production, run under Gunicorn instead (settings in gunicorn.conf.py):
+    #   cd src && gunicorn status_app:app
     app.run(debug=True, port=5000)
 
 # --- Sample data/data.json file ---